@@ -10,6 +10,8 @@ class Settings(BaseSettings):
     
     HF_API_TOKEN: str
     HF_EMBEDDING_API_URL: str = "https://huggingface.co/sentence-transformers/all-MiniLM-L6-v2"
+    # Seconds before an embedding request is abandoned, so a hung call can't stall a search
+    HF_INFERENCE_TIMEOUT: float = 30.0
 
     # --- UPDATE PINECONE SETTINGS ---
     PINECONE_API_KEY: str
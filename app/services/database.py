@@ -1,17 +1,153 @@
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
 import psycopg2
+from psycopg2.extras import execute_batch
+from psycopg2.pool import ThreadedConnectionPool
 import pandas as pd
 from app.config import settings
-import json
+from app.services.scraped_keys import map_scraped_key
+import orjson
+from collections import defaultdict
+
+# Maps Google Sheet headers to 'companies' table columns.
+SHEET_COLUMN_MAPPING = {
+    'Company': 'name', 'Website': 'website', 'Latest Funding ': 'latest_funding',
+    'Latest Funding Date ': 'latest_funding_date', 'Total Funding': 'total_funding',
+    'Investors': 'investors', 'Valuation': 'valuation', 'Overview (Product, Model & Moat)': 'overview',
+    'Sector': 'sector', 'Sinarmas Interest': 'sinarmas_interest', 'Implied Valuation': 'implied_valuation',
+    'Share transfer allowed ?': 'share_transfer_allowed', 'Liquidity EZ': 'liquidity_ez',
+    'Liquidity Forge': 'liquidity_forge', 'Liquidity Nasdaq': 'liquidity_nasdaq', 'Summary': 'summary',
+    'Sellers Ask': 'sellers_ask', 'Buyers Bid': 'buyers_bid', 
+    'Highest Bid Price': 'highest_bid_price', 'Lowest Ask Price': 'lowest_ask_price',
+    'Price History (JSON)': 'price_history', 'Funding History (JSON)': 'funding_history',
+    'EZ Total Bid Volume': 'ez_total_bid_volume', 'EZ Total Ask Volume': 'ez_total_ask_volume'
+}
+
+# Maps scraped keys to DB columns
+SCRAPED_KEY_TO_COLUMN = {
+    'Overview': 'overview',
+    'Investors': 'investors',
+    'Highest Qualified Bid': 'highest_bid_price',
+    'Total Bid Volume': 'ez_total_bid_volume',
+    'Total Ask Volume': 'ez_total_ask_volume',
+    'Funding History': 'funding_history',
+    # Additional mappings for other market activity fields
+    'EquityZen Reference Price': 'ez_reference_price',
+}
+
+# Columns that may be read by name; column names can't be parameterized in SQL.
+ALLOWED_FIELDS = frozenset(SHEET_COLUMN_MAPPING.values())
 
 class DatabaseClient:
+    # Upper bound on open connections; extra callers wait for one to be returned.
+    MAX_CONNECTIONS = 8
+    # Connections idle longer than this are pinged before reuse, since a server that
+    # dropped them (e.g. on suspend) isn't noticed until the next query fails.
+    PING_AFTER_IDLE_SECONDS = 60
+
     def __init__(self):
-        self.conn = None
+        self.pool = None
+        # ThreadedConnectionPool raises PoolError instead of waiting when all its
+        # connections are in use, so callers queue on this semaphore first.
+        self._pool_slots = threading.BoundedSemaphore(self.MAX_CONNECTIONS)
+        # id(conn) -> time.monotonic() when the connection was last returned to the pool
+        self._returned_at = {}
+        # {company_name: {field_name: value}} for field lookups made during a run.
+        # Writes through this client drop the affected companies' entries once
+        # committed; the generation counter stops a read that overlapped such a
+        # write from caching the pre-write value afterwards.
+        self._field_cache = {}
+        self._field_cache_generation = 0
+        self._field_cache_lock = threading.Lock()
         try:
-            self.conn = psycopg2.connect(settings.DATABASE_URL)
+            # One process-wide pool shared by every caller (and worker thread), so
+            # connections are opened once and reused instead of per call. The pool
+            # only keeps `minconn` idle connections, so keep two warm for concurrent workers.
+            self.pool = ThreadedConnectionPool(2, self.MAX_CONNECTIONS, settings.DATABASE_URL)
             print("✅ Successfully connected to the database.")
         except Exception as e:
             print(f"❌ Could not connect to the database: {e}")
 
+    @contextmanager
+    def _connection(self):
+        """
+        Borrows a connection from the pool and always hands it back.
+        The pool rolls back any transaction left open on return. Blocks while
+        all MAX_CONNECTIONS connections are borrowed.
+        """
+        with self._pool_slots:
+            conn = self._get_live_connection()
+            try:
+                yield conn
+            finally:
+                # A connection that broke during use is discarded rather than reused,
+                # so the next caller transparently gets a fresh one.
+                if conn.closed:
+                    self._returned_at.pop(id(conn), None)
+                else:
+                    self._returned_at[id(conn)] = time.monotonic()
+                self.pool.putconn(conn, close=bool(conn.closed))
+
+    def _get_live_connection(self):
+        """
+        Takes a connection from the pool, replacing any the server has dropped.
+        A dropped connection still reports closed == 0 until it is used, so ones
+        that sat idle for a while are checked with a trivial query first.
+        """
+        # Every pooled connection may be dead, plus one attempt for a fresh connection
+        for _ in range(self.MAX_CONNECTIONS + 1):
+            conn = self.pool.getconn()
+            returned_at = self._returned_at.pop(id(conn), None)
+            if not conn.closed:
+                # Connections never seen before (e.g. opened when the pool was created)
+                # may have sat idle for any length of time, so they are pinged too.
+                if returned_at is not None and time.monotonic() - returned_at < self.PING_AFTER_IDLE_SECONDS:
+                    return conn
+                try:
+                    with conn.cursor() as cur:
+                        cur.execute("SELECT 1")
+                    conn.rollback()
+                    return conn
+                except (psycopg2.OperationalError, psycopg2.InterfaceError):
+                    print("⚠️ Discarding a pooled database connection the server has closed.")
+            self.pool.putconn(conn, close=True)
+        raise psycopg2.OperationalError("Could not obtain a live database connection from the pool.")
+
+    def clear_field_cache(self, company_names=None):
+        """
+        Forgets cached field values, for the given companies or for all of them.
+        Call this at the start of a run to pick up edits made outside this client.
+        """
+        with self._field_cache_lock:
+            self._field_cache_generation += 1
+            if company_names is None:
+                self._field_cache.clear()
+                return
+            for company_name in company_names:
+                self._field_cache.pop(company_name, None)
+
+    def _cache_fields(self, generation: int, company_name: str, values: dict):
+        """
+        Stores values read from the DB, unless a write was committed since the
+        read started (generation changed), in which case they may be stale.
+        """
+        with self._field_cache_lock:
+            if generation == self._field_cache_generation:
+                self._field_cache.setdefault(company_name, {}).update(values)
+
+    @contextmanager
+    def _invalidating_fields(self, company_names=None):
+        """
+        Drops the given companies' cached fields after the enclosed write has
+        committed (or failed), so no reader can re-cache the pre-write row.
+        """
+        try:
+            yield
+        finally:
+            self.clear_field_cache(company_names)
+
     def get_field_value(self, company_name: str, field_name: str):
         """
         Retrieves the value of a specific field for a given company.
@@ -23,24 +159,19 @@ class DatabaseClient:
         Returns:
             The field value if found, None otherwise
         """
-        if not self.conn:
+        if not self.pool:
             return None
+
+        cached_fields = self._field_cache.get(company_name, {})
+        if field_name in cached_fields:
+            return cached_fields[field_name]
+        generation = self._field_cache_generation
         
         try:
-            with self.conn.cursor() as cur:
+            with self._connection() as conn, conn.cursor() as cur:
                 # Use parameterized query to prevent SQL injection
                 # Note: We can't use %s for column names, so we validate the field_name
-                allowed_fields = [
-                    'name', 'website', 'latest_funding', 'latest_funding_date', 
-                    'total_funding', 'investors', 'valuation', 'overview', 'sector',
-                    'sinarmas_interest', 'implied_valuation', 'share_transfer_allowed',
-                    'liquidity_ez', 'liquidity_forge', 'liquidity_nasdaq', 'summary',
-                    'sellers_ask', 'buyers_bid', 'ez_total_bid_volume', 'ez_total_ask_volume',
-                    'highest_bid_price', 'lowest_ask_price', 'price_history',
-                    'funding_history'
-                ]
-                
-                if field_name not in allowed_fields:
+                if field_name not in ALLOWED_FIELDS:
                     print(f"⚠️ Invalid field name: {field_name}")
                     return None
                 
@@ -48,170 +179,304 @@ class DatabaseClient:
                 cur.execute(sql, (company_name,))
                 result = cur.fetchone()
                 
-                if result:
-                    return result[0]
-                return None
+                value = result[0] if result else None
+                self._cache_fields(generation, company_name, {field_name: value})
+                return value
                 
         except Exception as e:
             print(f"⚠️ Error retrieving field '{field_name}' for {company_name}: {e}")
             return None
 
+    def get_fields(self, company_name: str, field_names: list[str]) -> dict:
+        """
+        Retrieves several fields for one company in a single query, instead of one
+        get_field_value round-trip per field.
+
+        Returns:
+            A {field_name: value} dict, or an empty dict if the company is not found
+        """
+        return self.get_fields_bulk([company_name], field_names).get(company_name, {})
+
+    def get_fields_bulk(self, company_names: list[str], field_names: list[str]) -> dict[str, dict]:
+        """
+        Retrieves several fields for many companies in a single query, so callers can
+        prefetch everything they need up front instead of calling get_field_value per
+        company and field. This always reads the DB, and the values read are cached
+        for later get_field_value calls so both paths agree.
+
+        Args:
+            company_names: The names of the companies
+            field_names: The database column names (e.g., ['overview', 'investors'])
+
+        Returns:
+            A dict mapping each company found to a {field_name: value} dict.
+            Companies missing from the table are absent from the result.
+        """
+        if not self.pool or not company_names:
+            return {}
+
+        invalid_fields = [field for field in field_names if field not in ALLOWED_FIELDS]
+        if invalid_fields:
+            print(f"⚠️ Invalid field name(s): {invalid_fields}")
+            return {}
+
+        sql = f"SELECT name, {', '.join(field_names)} FROM companies WHERE name = ANY(%s)"
+        generation = self._field_cache_generation
+
+        try:
+            with self._connection() as conn, conn.cursor() as cur:
+                cur.execute(sql, (list(company_names),))
+                results = {row[0]: dict(zip(field_names, row[1:])) for row in cur.fetchall()}
+            for company_name, values in results.items():
+                self._cache_fields(generation, company_name, values)
+            return results
+        except Exception as e:
+            print(f"⚠️ Error retrieving fields {field_names} for {len(company_names)} companies: {e}")
+            return {}
+
+    def _execute_batch_isolated(self, cur, sql: str, rows: list, describe_row):
+        """
+        Runs `sql` for every row with execute_batch. If the batch fails it is rolled
+        back to a savepoint and retried row by row, so one bad row doesn't discard
+        the rest of the transaction. describe_row(row) names a failing row in the log.
+        """
+        cur.execute("SAVEPOINT isolated_batch")
+        try:
+            execute_batch(cur, sql, rows)
+        except Exception as e:
+            print(f"   - ❌ DB Error in a batch of {len(rows)} row(s) ({e}). Retrying them one by one.")
+            cur.execute("ROLLBACK TO SAVEPOINT isolated_batch")
+            for row in rows:
+                cur.execute("SAVEPOINT isolated_row")
+                try:
+                    cur.execute(sql, row)
+                except Exception as e:
+                    print(f"   - ❌ DB Error for {describe_row(row)}: {e}. Rolling back this row.")
+                    cur.execute("ROLLBACK TO SAVEPOINT isolated_row")
+
     def sync_sheet_data(self, df: pd.DataFrame):
         """
         Synchronizes a DataFrame from Google Sheets into the 'companies' table.
         It uses an UPSERT operation: inserts new companies and updates existing ones.
         It also validates data for JSONB columns before syncing.
         """
-        if not self.conn:
+        if not self.pool:
             return
         
-        column_mapping = {
-            'Company': 'name', 'Website': 'website', 'Latest Funding ': 'latest_funding',
-            'Latest Funding Date ': 'latest_funding_date', 'Total Funding': 'total_funding',
-            'Investors': 'investors', 'Valuation': 'valuation', 'Overview (Product, Model & Moat)': 'overview',
-            'Sector': 'sector', 'Sinarmas Interest': 'sinarmas_interest', 'Implied Valuation': 'implied_valuation',
-            'Share transfer allowed ?': 'share_transfer_allowed', 'Liquidity EZ': 'liquidity_ez',
-            'Liquidity Forge': 'liquidity_forge', 'Liquidity Nasdaq': 'liquidity_nasdaq', 'Summary': 'summary',
-            'Sellers Ask': 'sellers_ask', 'Buyers Bid': 'buyers_bid', 
-            'Highest Bid Price': 'highest_bid_price', 'Lowest Ask Price': 'lowest_ask_price',
-            'Price History (JSON)': 'price_history', 'Funding History (JSON)': 'funding_history',
-            'EZ Total Bid Volume': 'ez_total_bid_volume', 'EZ Total Ask Volume': 'ez_total_ask_volume'
-        }
-        df.rename(columns=column_mapping, inplace=True)
-
-        table_columns = list(column_mapping.values())
-        df_filtered = df[[col for col in df.columns if col in table_columns]]
+        df.rename(columns=SHEET_COLUMN_MAPPING, inplace=True)
+
+        df_filtered = df[[col for col in df.columns if col in ALLOWED_FIELDS]]
         
         records = df_filtered.to_dict(orient='records')
 
-        with self.conn.cursor() as cur:
-            for record in records:
-                # --- JSON VALIDATION LOGIC ---
-                json_columns = ['price_history', 'funding_history']
-                for col in json_columns:
-                    if col in record:
-                        value = record[col]
-                        # Check if it's a string-like value before trying to parse
-                        if isinstance(value, str) and value.strip():
-                            try:
-                                # Test if it's valid JSON. If not, this will raise an error.
-                                json.loads(value)
-                            except (json.JSONDecodeError, TypeError):
-                                # If it's not valid JSON, set it to None to store as NULL
-                                print(f"Warning: Invalid JSON for {record.get('name')} in column '{col}'. Setting to NULL.")
-                                record[col] = None
-                        else:
-                            # If it's empty, NaN, or None, set it to None for the DB
-                            record[col] = None
-                # --- END OF JSON VALIDATION ---
-
-                # Prepare for UPSERT
-                record = {k: v for k, v in record.items() if pd.notna(v)} # Remove any remaining NaN values
-                
-                if 'name' not in record or not record['name']:
-                    print("Skipping record with no name.")
-                    continue
+        # Every record comes from the same DataFrame, so resolve which JSON columns
+        # are present once instead of checking each record.
+        json_columns = [col for col in ('price_history', 'funding_history') if col in df_filtered.columns]
+
+        # Consecutive records with the same column set are grouped so each run can be
+        # sent with execute_batch instead of one round-trip per company. Runs stay in
+        # sheet order, so a company listed twice still ends with its last row's values.
+        upsert_batches = []
 
-                cols = ', '.join(record.keys())
-                placeholders = ', '.join(['%s'] * len(record))
-                update_placeholders = ', '.join([f"{col} = EXCLUDED.{col}" for col in record.keys() if col != 'name'])
+        for record in records:
+            # --- JSON VALIDATION LOGIC ---
+            for col in json_columns:
+                value = record[col]
+                # Check if it's a string-like value before trying to parse
+                if isinstance(value, str) and value.strip():
+                    try:
+                        # Test if it's valid JSON. If not, this will raise an error.
+                        orjson.loads(value)
+                    except (orjson.JSONDecodeError, TypeError):
+                        # If it's not valid JSON, set it to None to store as NULL
+                        print(f"Warning: Invalid JSON for {record.get('name')} in column '{col}'. Setting to NULL.")
+                        record[col] = None
+                else:
+                    # If it's empty, NaN, or None, set it to None for the DB
+                    record[col] = None
+            # --- END OF JSON VALIDATION ---
 
+            # Prepare for UPSERT
+            record = {k: v for k, v in record.items() if pd.notna(v)} # Remove any remaining NaN values
+
+            if 'name' not in record or not record['name']:
+                print("Skipping record with no name.")
+                continue
+
+            cols = tuple(record)
+            if not upsert_batches or upsert_batches[-1][0] != cols:
+                upsert_batches.append((cols, []))
+            upsert_batches[-1][1].append(list(record.values()))
+
+        with self._invalidating_fields(), self._connection() as conn, conn.cursor() as cur:
+            for cols, rows in upsert_batches:
+                update_placeholders = ', '.join([f"{col} = EXCLUDED.{col}" for col in cols if col != 'name'])
+                conflict_action = f"DO UPDATE SET {update_placeholders}" if update_placeholders else "DO NOTHING"
                 upsert_sql = f"""
-                INSERT INTO companies ({cols}) VALUES ({placeholders})
-                ON CONFLICT (name) DO UPDATE SET {update_placeholders};
+                INSERT INTO companies ({', '.join(cols)}) VALUES ({', '.join(['%s'] * len(cols))})
+                ON CONFLICT (name) {conflict_action};
                 """
-                
-                try:
-                    cur.execute(upsert_sql, list(record.values()))
-                except Exception as e:
-                    print(f"Error on record '{record.get('name')}': {e}. Rolling back this record.")
-                    self.conn.rollback()
-            
-            self.conn.commit()
+
+                name_index = cols.index('name')
+                self._execute_batch_isolated(cur, upsert_sql, rows, lambda row: f"record '{row[name_index]}'")
+
+            conn.commit()
             print(f"✅ Sync process finished.")
 
-    def update_scraped_data(self, company_name: str, data: dict):
+    def _split_scraped_data(self, data: dict) -> tuple[dict, dict]:
         """
-        Updates a company record with scraped data using conditional logic.
-        - Investors/Overview are only updated if they are currently NULL or empty.
-        - Other fields are updated unconditionally.
+        Maps scraped keys to DB columns and splits them into unconditional
+        updates and conditional (only-if-empty) updates.
         """
-        if not self.conn: 
-            return
-
-        # Map scraped keys to DB columns
-        key_to_col_map = {
-            'Overview': 'overview',
-            'Investors': 'investors',
-            'Highest Qualified Bid': 'highest_bid_price',
-            'Total Bid Volume': 'ez_total_bid_volume',
-            'Total Ask Volume': 'ez_total_ask_volume',
-            'Funding History': 'funding_history',
-            # Additional mappings for other market activity fields
-            'EquityZen Reference Price': 'ez_reference_price',
-
-        }
-        
         unconditional_data = {}
         conditional_data = {}
 
         for key, value in data.items():
-            # Try direct mapping first
-            col = key_to_col_map.get(key)
-            
-            # If not found, try normalized key
-            if not col:
-                normalized_key = key.title().replace("Qualified ", "")
-                col = key_to_col_map.get(normalized_key)
-            
+            col = map_scraped_key(key, SCRAPED_KEY_TO_COLUMN)
             if col:
                 if col in ['overview', 'investors']:
                     conditional_data[col] = value
                 else:
                     unconditional_data[col] = value
 
-        with self.conn.cursor() as cur:
-            # 1. Unconditional updates (Market Activity, Funding)
-            if unconditional_data:
-                set_clause = ", ".join([f"{key} = %s" for key in unconditional_data.keys()])
-                sql = f"UPDATE companies SET {set_clause} WHERE name = %s"
-                try:
-                    cur.execute(sql, list(unconditional_data.values()) + [company_name])
-                    if cur.rowcount > 0:
-                        print(f"   - DB: Updated {len(unconditional_data)} unconditional field(s) for {company_name}.")
-                    else:
-                        print(f"   - DB: No rows updated (company may not exist): {company_name}")
-                except Exception as e:
-                    print(f"   - ❌ DB Error (unconditional) for {company_name}: {e}")
-                    self.conn.rollback()
-            
-            # 2. Conditional updates (Overview, Investors) - only if currently empty
-            if conditional_data:
-                for col, value in conditional_data.items():
-                    sql = f"UPDATE companies SET {col} = %s WHERE name = %s AND ({col} IS NULL OR {col} = '')"
+        return unconditional_data, conditional_data
+
+    def update_scraped_data(self, company_name: str, data: dict):
+        """
+        Updates a company record with scraped data using conditional logic.
+        - Investors/Overview are only updated if they are currently NULL or empty.
+        - Other fields are updated unconditionally.
+        """
+        if not self.pool: 
+            return
+
+        unconditional_data, conditional_data = self._split_scraped_data(data)
+
+        if not unconditional_data and not conditional_data:
+            return
+
+        with self._invalidating_fields([company_name]), self._connection() as conn, conn.cursor() as cur:
+            try:
+                self._execute_scraped_update(cur, company_name, unconditional_data, conditional_data)
+                conn.commit()
+            except Exception as e:
+                print(f"   - ❌ DB Error updating scraped data for {company_name}: {e}")
+                if conn.closed:
+                    return
+                conn.rollback()
+                # Keep the old isolation: a bad unconditional column must not block
+                # filling empty Overview/Investors.
+                if unconditional_data and conditional_data:
                     try:
-                        cur.execute(sql, (value, company_name))
-                        if cur.rowcount > 0:
-                            print(f"   - DB: Updated empty '{col}' for {company_name}.")
-                        else:
-                            print(f"   - DB: '{col}' already has data for {company_name}, skipped.")
+                        self._execute_scraped_update(cur, company_name, {}, conditional_data)
+                        conn.commit()
                     except Exception as e:
-                        print(f"   - ❌ DB Error (conditional '{col}') for {company_name}: {e}")
-                        self.conn.rollback()
-            
-            self.conn.commit()
+                        print(f"   - ❌ DB Error (conditional) for {company_name}: {e}")
+                        if not conn.closed:
+                            conn.rollback()
+
+    def _execute_scraped_update(self, cur, company_name: str, unconditional_data: dict, conditional_data: dict):
+        """
+        Applies both kinds of scraped updates in a single UPDATE round-trip.
+        Overview/Investors only take the new value when currently empty; joining the
+        row to itself ("old") exposes the pre-update values so RETURNING can report
+        which of those were actually filled.
+        """
+        set_parts = [f"{col} = %s" for col in unconditional_data]
+        set_parts += [
+            f"{col} = CASE WHEN old.{col} IS NULL OR old.{col} = '' THEN %s ELSE old.{col} END"
+            for col in conditional_data
+        ]
+        empty_checks = [f"(old.{col} IS NULL OR old.{col} = '')" for col in conditional_data]
+        returning = ", ".join(empty_checks) or "TRUE"
+        # With only conditional columns, skip the row when none of them is empty
+        # rather than rewriting it with its own values.
+        only_if_empty = "" if unconditional_data else f" AND ({' OR '.join(empty_checks)})"
+        sql = f"""
+        UPDATE companies SET {', '.join(set_parts)}
+        FROM companies AS old
+        WHERE companies.name = %s AND old.id = companies.id{only_if_empty}
+        RETURNING {returning}
+        """
+        cur.execute(sql, list(unconditional_data.values()) + list(conditional_data.values()) + [company_name])
+
+        was_empty = cur.fetchone()
+        if was_empty is None:
+            if unconditional_data:
+                print(f"   - DB: No rows updated (company may not exist): {company_name}")
+            else:
+                print(f"   - DB: {list(conditional_data)} already have data (or company not found) for {company_name}, skipped.")
+            return
+        if unconditional_data:
+            print(f"   - DB: Updated {len(unconditional_data)} unconditional field(s) for {company_name}.")
+        for col, updated in zip(conditional_data, was_empty):
+            if updated:
+                print(f"   - DB: Updated empty '{col}' for {company_name}.")
+            else:
+                print(f"   - DB: '{col}' already has data for {company_name}, skipped.")
+
+    def bulk_update_scraped_data(self, items: list[tuple[str, dict]]):
+        """
+        Applies update_scraped_data to many companies in a single transaction.
+        Statements with the same shape are grouped and sent with execute_batch,
+        so the whole batch costs a handful of round-trips and one commit.
+        """
+        if not self.pool or not items:
+            return
+
+        unconditional_batches = defaultdict(list)
+        conditional_batches = defaultdict(list)
+
+        for company_name, data in items:
+            unconditional_data, conditional_data = self._split_scraped_data(data)
+            if unconditional_data:
+                unconditional_batches[tuple(unconditional_data)].append(list(unconditional_data.values()) + [company_name])
+            for col, value in conditional_data.items():
+                conditional_batches[col].append((value, company_name))
+
+        statements = []
+        # 1. Unconditional updates (Market Activity, Funding)
+        for cols, params in unconditional_batches.items():
+            set_clause = ", ".join([f"{key} = %s" for key in cols])
+            statements.append((f"UPDATE companies SET {set_clause} WHERE name = %s", params))
+        # 2. Conditional updates (Overview, Investors) - only if currently empty
+        for col, params in conditional_batches.items():
+            statements.append((f"UPDATE companies SET {col} = %s WHERE name = %s AND ({col} IS NULL OR {col} = '')", params))
+
+        with self._invalidating_fields([company_name for company_name, _ in items]), \
+                self._connection() as conn, conn.cursor() as cur:
+            for sql, params in statements:
+                # The company name is always the last parameter
+                self._execute_batch_isolated(cur, sql, params, lambda row: row[-1])
+
+            conn.commit()
+            print(f"   - DB: Bulk updated scraped data for {len(items)} companies.")
+
+    async def update_scraped_data_async(self, company_name: str, data: dict):
+        """
+        Async variant of update_scraped_data for use inside async scrapers.
+        The blocking psycopg2 call runs in a worker thread on its own pooled
+        connection, so it doesn't stall the event loop.
+        """
+        await asyncio.to_thread(self.update_scraped_data, company_name, data)
+
+    async def bulk_update_scraped_data_async(self, items: list[tuple[str, dict]]):
+        """
+        Async variant of bulk_update_scraped_data, run in a worker thread.
+        """
+        await asyncio.to_thread(self.bulk_update_scraped_data, items)
     
     def get_all_company_names(self):
         """
         Fetches a list of all unique company names from the database.
         """
-        if not self.conn:
+        if not self.pool:
             return []
         
         query = "SELECT DISTINCT name FROM companies WHERE name IS NOT NULL"
         
         try:
-            with self.conn.cursor() as cursor:
+            with self._connection() as conn, conn.cursor() as cursor:
                 cursor.execute(query)
                 results = [item[0] for item in cursor.fetchall()]
                 return results
@@ -219,19 +484,51 @@ class DatabaseClient:
             print(f"❌ Error fetching company names from database: {e}")
             return []
 
-    # --- NEW METHOD for Hiive Scraper ---
-    def update_hiive_prices(self, company_name: str, highest_bid: str, lowest_ask: str):
+    def get_incomplete_company_names(self, field_names: list[str]) -> list[str]:
         """
-        Updates the highest bid and lowest ask prices for a specific company.
+        Fetches the names of companies where at least one of the given fields is
+        NULL or empty. Backfill runs can scrape only these and skip companies whose
+        data is already complete, avoiding their page loads entirely.
         """
-        if not self.conn:
-            return
+        if not self.pool or not field_names:
+            return []
+
+        invalid_fields = [field for field in field_names if field not in ALLOWED_FIELDS]
+        if invalid_fields:
+            print(f"⚠️ Invalid field name(s): {invalid_fields}")
+            return []
+
+        missing_clause = " OR ".join(f"({field} IS NULL OR {field} = '')" for field in field_names)
+        query = f"SELECT DISTINCT name FROM companies WHERE name IS NOT NULL AND ({missing_clause})"
+
+        try:
+            with self._connection() as conn, conn.cursor() as cursor:
+                cursor.execute(query)
+                return [item[0] for item in cursor.fetchall()]
+        except Exception as e:
+            print(f"❌ Error fetching incomplete companies from database: {e}")
+            return []
 
+    def _hiive_price_data(self, highest_bid: str | None, lowest_ask: str | None) -> dict:
+        """
+        Maps scraped Hiive prices to their columns, leaving out missing prices.
+        """
         update_data = {}
         if highest_bid:
             update_data["highest_bid_price"] = highest_bid
         if lowest_ask:
             update_data["lowest_ask_price"] = lowest_ask
+        return update_data
+
+    # --- NEW METHOD for Hiive Scraper ---
+    def update_hiive_prices(self, company_name: str, highest_bid: str, lowest_ask: str):
+        """
+        Updates the highest bid and lowest ask prices for a specific company.
+        """
+        if not self.pool:
+            return
+
+        update_data = self._hiive_price_data(highest_bid, lowest_ask)
 
         if not update_data:
             print(f"   - DB: No Hiive price data provided for {company_name}.")
@@ -240,23 +537,63 @@ class DatabaseClient:
         set_clause = ", ".join([f"{key} = %s" for key in update_data.keys()])
         sql = f"UPDATE companies SET {set_clause} WHERE name = %s"
         
-        try:
-            with self.conn.cursor() as cur:
-                cur.execute(sql, list(update_data.values()) + [company_name])
-                if cur.rowcount > 0:
-                    print(f"   - ✅ DB: Successfully updated Hiive prices for {company_name}.")
-                else:
-                    # This is not an error, the company might not exist in the DB.
-                    print(f"   - ⚠️ DB: Company '{company_name}' not found. No update performed.")
-                self.conn.commit()
-        except Exception as e:
-            print(f"   - ❌ DB Error updating Hiive prices for {company_name}: {e}")
-            self.conn.rollback()
+        with self._invalidating_fields([company_name]), self._connection() as conn:
+            try:
+                with conn.cursor() as cur:
+                    cur.execute(sql, list(update_data.values()) + [company_name])
+                    if cur.rowcount > 0:
+                        print(f"   - ✅ DB: Successfully updated Hiive prices for {company_name}.")
+                    else:
+                        # This is not an error, the company might not exist in the DB.
+                        print(f"   - ⚠️ DB: Company '{company_name}' not found. No update performed.")
+                    conn.commit()
+            except Exception as e:
+                print(f"   - ❌ DB Error updating Hiive prices for {company_name}: {e}")
+                if not conn.closed:
+                    conn.rollback()
     # --- END NEW METHOD ---
 
+    def bulk_update_hiive_prices(self, updates: list[tuple[str, str | None, str | None]]):
+        """
+        Applies update_hiive_prices to many companies in a single transaction.
+        Each update is (company_name, highest_bid, lowest_ask); a missing price leaves
+        that column untouched. Updates are grouped by which prices they carry and
+        sent with execute_batch instead of one round-trip and commit per company.
+        """
+        if not self.pool or not updates:
+            return
+
+        batches = defaultdict(list)
+        for company_name, highest_bid, lowest_ask in updates:
+            update_data = self._hiive_price_data(highest_bid, lowest_ask)
+            if update_data:
+                batches[tuple(update_data)].append(list(update_data.values()) + [company_name])
+
+        if not batches:
+            print(f"   - DB: No Hiive price data provided for {len(updates)} companies.")
+            return
+
+        with self._invalidating_fields([company_name for company_name, _, _ in updates]), \
+                self._connection() as conn, conn.cursor() as cur:
+            for cols, params in batches.items():
+                set_clause = ", ".join([f"{key} = %s" for key in cols])
+                sql = f"UPDATE companies SET {set_clause} WHERE name = %s"
+                # The company name is always the last parameter
+                self._execute_batch_isolated(cur, sql, params, lambda row: f"Hiive prices of {row[-1]}")
+
+            conn.commit()
+            print(f"   - ✅ DB: Bulk updated Hiive prices for {sum(len(p) for p in batches.values())} companies.")
+
+    async def bulk_update_hiive_prices_async(self, updates: list[tuple[str, str | None, str | None]]):
+        """
+        Async variant of bulk_update_hiive_prices, run in a worker thread so a
+        scraper can flush a batch without stalling its event loop.
+        """
+        await asyncio.to_thread(self.bulk_update_hiive_prices, updates)
+
     def close(self):
-        if self.conn:
-            self.conn.close()
+        if self.pool:
+            self.pool.closeall()
             print("✅ Database connection closed.")
 
 db_client = DatabaseClient()
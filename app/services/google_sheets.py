@@ -1,12 +1,38 @@
 # app/services/google_sheets.py
+import asyncio
+import threading
 import gspread
 import pandas as pd
 from google.oauth2.service_account import Credentials
 from app.config import settings
+from app.services.scraped_keys import map_scraped_key
 import traceback
 
+# Maps scraped keys to sheet headers
+SCRAPED_KEY_TO_HEADER = {
+    'Overview': 'Overview (Product, Model & Moat)',
+    'Investors': 'Investors',
+    'Highest Qualified Bid': 'Highest Bid Price',
+    'Total Bid Volume': 'EZ Total Bid Volume',
+    'Total Ask Volume': 'EZ Total Ask Volume',
+    'Funding History': 'Funding History (JSON)',
+    'Last 30D Transaction': 'Last 30D Transaction',
+    'EquityZen Reference Price': 'EquityZen Reference Price',
+    'Market Score': 'Market Score'
+}
+
+# Conditional fields that should only update if empty
+CONDITIONAL_HEADERS = ('Investors', 'Overview (Product, Model & Moat)')
+
 class GoogleSheetsClient:
     def __init__(self):
+        self._worksheet = None
+        # Populated by prime_row_index(); None means every update reads the sheet itself
+        self._headers = None
+        self._row_index = None
+        # Serializes writes issued from the async wrappers so row lookups and
+        # appends from concurrent tasks don't race each other.
+        self._write_lock = threading.Lock()
         try:
             scopes = [
                 "https://www.googleapis.com/auth/spreadsheets",
@@ -24,6 +50,16 @@ class GoogleSheetsClient:
             print(f"--- FATAL ERROR ---: An error occurred during Google Sheets authentication: {e}")
             self.client = None
     
+    def _get_worksheet(self) -> gspread.Worksheet:
+        """
+        Returns the configured worksheet, opening it on first use only.
+        Opening costs two API round-trips, so the handle is reused across calls.
+        """
+        if self._worksheet is None:
+            spreadsheet = self.client.open(settings.GOOGLE_SHEET_NAME)
+            self._worksheet = spreadsheet.worksheet(settings.WORKSHEET_NAME)
+        return self._worksheet
+
     def get_company_list(self) -> list[str]:
         """
         Fetches a clean list of company names from the 'Company' column in the Google Sheet.
@@ -32,27 +68,80 @@ class GoogleSheetsClient:
             A list of company names as strings. Returns an empty list on failure.
         """
         print("--- INFO ---: Fetching company list from Google Sheet...")
-        df = self.get_all_records_as_df()
-        if df.empty or 'Company' not in df.columns:
-            print("--- WARNING ---: DataFrame is empty or 'Company' column not found.")
+        # Only the 'Company' column is needed, so avoid downloading every record
+        columns = self._get_columns('Company')
+        if not columns:
+            print("--- WARNING ---: Sheet is empty or 'Company' column not found.")
             return []
-        
-        # Drop any rows where the company name is missing, and get a unique list
-        companies = df['Company'].dropna().unique().tolist()
-        # Filter out any potential empty strings that might have slipped through
-        companies = [name for name in companies if name]
+
+        # Drop blank names and duplicates while keeping sheet order. Names are returned
+        # exactly as stored, since the write paths match on the raw cell value.
+        companies = list(dict.fromkeys(name for name in columns[0] if name.strip()))
 
         print(f"--- INFO ---: Found {len(companies)} companies to process.")
         return companies
 
+    def get_existing_data_column(self, header: str) -> dict[str, str]:
+        """
+        Fetches the current value of one column for every company in a single read,
+        so callers can skip companies whose data is already present.
+
+        Returns:
+            A dict mapping company name to the cell value ('' when empty).
+            Returns an empty dict on failure.
+        """
+        columns = self._get_columns('Company', header)
+        if not columns:
+            print(f"--- WARNING ---: Sheet is empty or 'Company'/'{header}' column not found.")
+            return {}
+
+        company_column, data_column = columns
+        data_column = data_column + [''] * (len(company_column) - len(data_column))
+        # Duplicate names keep their first row, which is the one the write paths target
+        existing_data = {}
+        for name, value in zip(company_column, data_column):
+            if name.strip():
+                existing_data.setdefault(name, value)
+        return existing_data
+
+    def _get_columns(self, *headers: str) -> list[list[str]] | None:
+        """
+        Reads the data rows of the given header columns with one batch request.
+        Returns None if the client is unavailable or a header is missing.
+        """
+        if not self.client:
+            print("--- DEBUG ---: Google Sheets client is not initialized.")
+            return None
+
+        try:
+            worksheet = self._get_worksheet()
+
+            sheet_headers = worksheet.row_values(1)
+            if any(header not in sheet_headers for header in headers):
+                return None
+
+            ranges = []
+            for header in headers:
+                column_letter = gspread.utils.rowcol_to_a1(1, sheet_headers.index(header) + 1)[:-1]
+                ranges.append(f"{column_letter}2:{column_letter}")
+
+            # Empty cells come back as empty rows; flatten to one string per sheet row
+            return [
+                [row[0] if row else '' for row in value_range]
+                for value_range in worksheet.batch_get(ranges)
+            ]
+
+        except Exception as e:
+            print(f"--- FATAL ERROR ---: An error occurred while fetching columns {headers}: {e}")
+            return None
+
     def get_all_records_as_df(self) -> pd.DataFrame:
         if not self.client:
             print("--- DEBUG ---: Google Sheets client is not initialized. Returning empty DataFrame.")
             return pd.DataFrame()
 
         try:
-            spreadsheet = self.client.open(settings.GOOGLE_SHEET_NAME)
-            worksheet = spreadsheet.worksheet(settings.WORKSHEET_NAME)
+            worksheet = self._get_worksheet()
             records = worksheet.get_all_records()
             
             df = pd.DataFrame(records)
@@ -70,6 +159,93 @@ class GoogleSheetsClient:
             print(f"--- FATAL ERROR ---: An error occurred while fetching data: {e}")
             return pd.DataFrame()
 
+    def _build_row_data(self, company_name: str, data: dict) -> dict:
+        """
+        Translates scraped keys into sheet headers for a single company row.
+        """
+        row_data = {"Company": company_name}
+        for scraped_key, value in data.items():
+            sheet_header = map_scraped_key(scraped_key, SCRAPED_KEY_TO_HEADER)
+            if sheet_header:
+                row_data[sheet_header] = value
+        return row_data
+
+    def prime_row_index(self) -> bool:
+        """
+        Reads the sheet once and caches the headers and each company's row number.
+        Call this before a run of update_or_add_company_data calls so each update
+        looks its row up locally instead of downloading the whole sheet again.
+
+        Returns:
+            True if the index was built, False on failure.
+        """
+        if not self.client:
+            return False
+
+        try:
+            all_values = self._get_worksheet().get_all_values()
+        except Exception as e:
+            print(f"--- FATAL ERROR ---: Could not build the sheet row index: {e}")
+            return False
+
+        self._headers = all_values[0] if all_values else []
+        self._row_index = self._index_rows(all_values)
+        print(f"--- INFO ---: Cached row positions for {len(self._row_index)} companies.")
+        return True
+
+    def _index_rows(self, all_values: list[list[str]]) -> dict[str, int]:
+        """
+        Maps each company name in column 1 to its (first) sheet row number.
+        Sheet row numbers are 1-based and row 1 holds the headers.
+        """
+        row_index = {}
+        for row_number, row_values in enumerate(all_values[1:], start=2):
+            if row_values and row_values[0] not in row_index:
+                row_index[row_values[0]] = row_number
+        return row_index
+
+    def _appended_start_row(self, response: dict) -> int | None:
+        """
+        Returns the first row number written by an append, e.g. "'Sheet1'!A57:X58" -> 57.
+        """
+        updated_range = (response or {}).get('updates', {}).get('updatedRange', '')
+        if not updated_range:
+            return None
+        first_cell = updated_range.split('!')[-1].split(':')[0]
+        return gspread.utils.a1_to_rowcol(first_cell)[0]
+
+    def _locate_company_row(self, worksheet: gspread.Worksheet, company_name: str) -> tuple[list[str], int | None, list[str]]:
+        """
+        Returns (headers, row_number, existing_row_values) for a company; row_number
+        is None if the company is not in the sheet. With a primed row index only the
+        header row and the company's own row are read, in one request. If either no
+        longer matches the cache, or the company isn't indexed, the whole sheet is
+        re-read and re-indexed.
+        """
+        row_number = self._row_index.get(company_name) if self._row_index is not None and self._headers else None
+        if row_number is not None:
+            header_range, company_range = worksheet.batch_get(['1:1', f'{row_number}:{row_number}'])
+            current_headers = header_range[0] if header_range else []
+            existing_row_values = company_range[0] if company_range else []
+            # Trailing empty cells are trimmed by the API but padded in get_all_values
+            cached_headers = list(self._headers)
+            while cached_headers and not cached_headers[-1]:
+                cached_headers.pop()
+            if current_headers == cached_headers and existing_row_values[:1] == [company_name]:
+                return self._headers, row_number, existing_row_values
+            print("--- WARNING ---: Cached row index is stale. Re-reading the sheet.")
+
+        # One read gives the headers, the company's row number and its current values
+        all_values = worksheet.get_all_values()
+        headers = all_values[0] if all_values else []
+        row_index = self._index_rows(all_values)
+        if self._row_index is not None:
+            self._headers, self._row_index = headers, row_index
+
+        row_number = row_index.get(company_name)
+        existing_row_values = all_values[row_number - 1] if row_number else []
+        return headers, row_number, existing_row_values
+
     def update_or_add_company_data(self, company_name: str, data: dict) -> bool:
         """
         Updates or adds company data to Google Sheets with conditional logic.
@@ -80,82 +256,166 @@ class GoogleSheetsClient:
             return False
         
         try:
-            spreadsheet = self.client.open(settings.GOOGLE_SHEET_NAME)
-            worksheet = spreadsheet.worksheet(settings.WORKSHEET_NAME)
-
-            # Map scraped keys to sheet headers
-            key_mapping = {
-                'Overview': 'Overview (Product, Model & Moat)',
-                'Investors': 'Investors',
-                'Highest Qualified Bid': 'Highest Bid Price',
-                'Total Bid Volume': 'EZ Total Bid Volume',
-                'Total Ask Volume': 'EZ Total Ask Volume',
-                'Funding History': 'Funding History (JSON)',
-                'Last 30D Transaction': 'Last 30D Transaction',
-                'EquityZen Reference Price': 'EquityZen Reference Price',
-                'Market Score': 'Market Score'
-            }
-            
-            row_data = {"Company": company_name}
-            for scraped_key, value in data.items():
-                # Try direct mapping first
-                if scraped_key in key_mapping:
-                    sheet_header = key_mapping[scraped_key]
-                    row_data[sheet_header] = value
-                else:
-                    # Try normalized key
-                    normalized_key = scraped_key.title().replace("Qualified ", "")
-                    if normalized_key in key_mapping:
-                        sheet_header = key_mapping[normalized_key]
-                        row_data[sheet_header] = value
-
-            headers = worksheet.row_values(1)
+            worksheet = self._get_worksheet()
+
+            row_data = self._build_row_data(company_name, data)
+
+            headers, row_number, existing_row_values = self._locate_company_row(worksheet, company_name)
             if not headers: # Handle empty sheet
                 headers = list(row_data.keys())
                 worksheet.update('A1', [headers])
+                if self._row_index is not None:
+                    self._headers = headers
 
-            # Logic for conditional updates
-            try:
-                cell = worksheet.find(company_name, in_column=1)
-                existing_row_values = worksheet.row_values(cell.row)
-                existing_row_dict = dict(zip(headers, existing_row_values))
-
-                # Conditional fields that should only update if empty
-                conditional_fields = ['Investors', 'Overview (Product, Model & Moat)']
-                
-                for field in conditional_fields:
-                    if field in row_data:
-                        existing_value = existing_row_dict.get(field, '').strip()
-                        if existing_value:
-                            # Field already has data, remove from update
-                            print(f"   - Sheet: '{field}' already has data for {company_name}, skipping.")
-                            del row_data[field]
-
-                # Now `row_data` only contains fields that should be updated
-                update_cells_list = []
-                for header, value in row_data.items():
-                    if header in headers and header != "Company":
-                        col_index = headers.index(header) + 1
-                        update_cells_list.append(gspread.Cell(cell.row, col_index, str(value)))
-                
-                if update_cells_list:
-                    worksheet.update_cells(update_cells_list, value_input_option='USER_ENTERED')
-                    print(f"   - Sheet: Updated {len(update_cells_list)} cell(s) for {company_name}.")
-                else:
-                    print(f"   - Sheet: No cells to update for {company_name}.")
-                
-                return True
-
-            except gspread.exceptions.CellNotFound:
+            if row_number is None:
                 # Company not found, so append a new row with all data
                 print(f"   - Sheet: Company '{company_name}' not found. Appending new row.")
                 new_row = [row_data.get(header, "") for header in headers]
-                worksheet.append_row(new_row, value_input_option='USER_ENTERED')
+                response = worksheet.append_row(new_row, value_input_option='USER_ENTERED')
+                if self._row_index is not None:
+                    appended_row = self._appended_start_row(response)
+                    if appended_row:
+                        self._row_index[company_name] = appended_row
                 return True
 
+            # Logic for conditional updates
+            existing_row_dict = dict(zip(headers, existing_row_values))
+
+            for field in CONDITIONAL_HEADERS:
+                if field in row_data:
+                    existing_value = existing_row_dict.get(field, '').strip()
+                    if existing_value:
+                        # Field already has data, remove from update
+                        print(f"   - Sheet: '{field}' already has data for {company_name}, skipping.")
+                        del row_data[field]
+
+            # Now `row_data` only contains fields that should be updated
+            update_cells_list = []
+            for header, value in row_data.items():
+                if header in headers and header != "Company":
+                    col_index = headers.index(header) + 1
+                    update_cells_list.append(gspread.Cell(row_number, col_index, str(value)))
+
+            if update_cells_list:
+                worksheet.update_cells(update_cells_list, value_input_option='USER_ENTERED')
+                print(f"   - Sheet: Updated {len(update_cells_list)} cell(s) for {company_name}.")
+            else:
+                print(f"   - Sheet: No cells to update for {company_name}.")
+
+            return True
+
         except Exception as e:
             print(f"--- FATAL ERROR ---: Sheet update failed for '{company_name}': {e}")
             traceback.print_exc()
             return False
 
+    def _merge_row_data(self, pending_row: dict, row_data: dict):
+        """
+        Folds a later entry for the same company into its pending row, following the
+        same rules as successive updates: conditional fields keep the first non-empty
+        value, everything else takes the latest one.
+        """
+        for header, value in row_data.items():
+            if header in CONDITIONAL_HEADERS and str(pending_row.get(header, '')).strip():
+                continue
+            pending_row[header] = value
+
+    def batch_update_or_add_company_data(self, companies: list[tuple[str, dict]]) -> bool:
+        """
+        Batched version of update_or_add_company_data for many companies at once.
+        Reads the sheet once, then writes every changed cell in a single update
+        and every new company in a single append, instead of several API calls
+        per company.
+        """
+        if not self.client:
+            return False
+        if not companies:
+            return True
+
+        try:
+            worksheet = self._get_worksheet()
+
+            all_values = worksheet.get_all_values()
+            headers = all_values[0] if all_values else []
+            rows_to_build = [self._build_row_data(name, data) for name, data in companies]
+            if not headers: # Handle empty sheet
+                headers = list(dict.fromkeys(key for row_data in rows_to_build for key in row_data))
+                worksheet.update('A1', [headers])
+                all_values = [headers]
+
+            row_index = self._index_rows(all_values)
+
+            # Repeats of a company within `companies` are merged into one pending row,
+            # keyed by name for new companies and by row number for existing ones
+            new_rows = {}
+            pending_updates = {}
+
+            for row_data in rows_to_build:
+                company_name = row_data["Company"]
+                row_number = row_index.get(company_name)
+
+                if row_number is None:
+                    if company_name not in new_rows:
+                        print(f"   - Sheet: Company '{company_name}' not found. Queued as new row.")
+                    self._merge_row_data(new_rows.setdefault(company_name, {}), row_data)
+                    continue
+
+                existing_row_dict = dict(zip(headers, all_values[row_number - 1]))
+                for field in CONDITIONAL_HEADERS:
+                    if field in row_data and existing_row_dict.get(field, '').strip():
+                        print(f"   - Sheet: '{field}' already has data for {company_name}, skipping.")
+                        del row_data[field]
+
+                self._merge_row_data(pending_updates.setdefault(row_number, {}), row_data)
+
+            update_cells_list = []
+            for row_number, row_data in pending_updates.items():
+                for header, value in row_data.items():
+                    if header in headers and header != "Company":
+                        col_index = headers.index(header) + 1
+                        update_cells_list.append(gspread.Cell(row_number, col_index, str(value)))
+
+            if update_cells_list:
+                worksheet.update_cells(update_cells_list, value_input_option='USER_ENTERED')
+            if new_rows:
+                response = worksheet.append_rows(
+                    [[row_data.get(header, "") for header in headers] for row_data in new_rows.values()],
+                    value_input_option='USER_ENTERED'
+                )
+                appended_row = self._appended_start_row(response)
+                if appended_row:
+                    for offset, company_name in enumerate(new_rows):
+                        row_index[company_name] = appended_row + offset
+
+            if self._row_index is not None:
+                # This read is fresher than the primed one. Companies whose append
+                # position is unknown stay unindexed, so a lookup re-reads the sheet.
+                self._headers, self._row_index = headers, row_index
+
+            print(f"   - Sheet: Batch updated {len(update_cells_list)} cell(s) and appended {len(new_rows)} row(s) for {len(companies)} companies.")
+            return True
+
+        except Exception as e:
+            print(f"--- FATAL ERROR ---: Batch sheet update failed for {len(companies)} companies: {e}")
+            traceback.print_exc()
+            return False
+
+    def _run_locked(self, method, *args):
+        with self._write_lock:
+            return method(*args)
+
+    async def update_or_add_company_data_async(self, company_name: str, data: dict) -> bool:
+        """
+        Async variant of update_or_add_company_data. The Sheets API calls run in a
+        worker thread, so scrapers can schedule the write with asyncio.create_task
+        and move on to the next company.
+        """
+        return await asyncio.to_thread(self._run_locked, self.update_or_add_company_data, company_name, data)
+
+    async def batch_update_or_add_company_data_async(self, companies: list[tuple[str, dict]]) -> bool:
+        """
+        Async variant of batch_update_or_add_company_data, run in a worker thread.
+        """
+        return await asyncio.to_thread(self._run_locked, self.batch_update_or_add_company_data, companies)
+
 sheets_client = GoogleSheetsClient()
\ No newline at end of file
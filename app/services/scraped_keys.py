@@ -0,0 +1,12 @@
+# app/services/scraped_keys.py
+
+def map_scraped_key(key: str, mapping: dict):
+    """
+    Looks up a scraped key in the given mapping, falling back to its normalized
+    form (title case, "Qualified " dropped) since scrapers don't label fields consistently.
+    Returns None if neither form is mapped.
+    """
+    target = mapping.get(key)
+    if not target:
+        target = mapping.get(key.title().replace("Qualified ", ""))
+    return target
@@ -1,30 +1,70 @@
+import asyncio
 import pandas as pd
-import re
-import time
 from pinecone import Pinecone
 from huggingface_hub import InferenceClient
 from typing import List, Dict, Any
 import traceback
+from functools import lru_cache
 from sqlalchemy import select, and_, or_
 
 # --- MODIFIED IMPORTS ---
 from app.database import database, companies
 from app.config import settings
 
+# Valuation and funding strings repeat heavily across rows and searches, and parsing is pure.
+# Kept at module level so the cache doesn't key on (and pin) a SearchService instance.
+@lru_cache(maxsize=4096)
+def _parse_monetary_value(value_str: str) -> float | None:
+    if not isinstance(value_str, str) or not value_str: return None
+    # Remove currency symbols and commas, handle 'B' for billion and 'M' for million
+    value_str = value_str.strip().replace('$', '').replace(',', '')
+    value_str_lower = value_str.lower()
+    
+    multiplier = 1
+    if 'b' in value_str_lower:
+        multiplier = 1_000_000_000
+        value_str = value_str_lower.replace('b', '')
+    elif 'm' in value_str_lower:
+        multiplier = 1_000_000
+        value_str = value_str_lower.replace('m', '')
+    
+    try:
+        return float(value_str) * multiplier
+    except (ValueError, TypeError):
+        return None
+
+
 class SearchService:
     def __init__(self):
         # This part remains the same
         self.embedding_model_id = 'sentence-transformers/all-MiniLM-L6-v2'
         self.embedding_dimension = 384
+        # Number of embedding/upsert batches allowed in flight during the startup sync
+        self.sync_concurrency = 4
 
         try:
             if not settings.HF_API_TOKEN:
                 raise ValueError("HF_API_TOKEN is not set in the environment.")
-            self.inference_client = InferenceClient(model=self.embedding_model_id, token=settings.HF_API_TOKEN)
+            self.inference_client = InferenceClient(
+                model=self.embedding_model_id,
+                token=settings.HF_API_TOKEN,
+                timeout=settings.HF_INFERENCE_TIMEOUT
+            )
         except Exception as e:
             print(f"--- [FATAL DEBUG] Error configuring Hugging Face client: {e} ---")
             self.inference_client = None
 
+        # Repeated queries reuse the embedding instead of paying for another inference call.
+        # Failed calls raise and are therefore never cached. The cache belongs to this
+        # instance rather than to the method, so it doesn't key on (and pin) `self`.
+        inference_client = self.inference_client
+
+        @lru_cache(maxsize=1024)
+        def embed_query(query: str) -> list:
+            return inference_client.feature_extraction(text=query).tolist()
+
+        self._embed_query = embed_query
+
         self.pinecone_index = None
         try:
             pc = Pinecone(api_key=settings.PINECONE_API_KEY)
@@ -74,7 +114,8 @@ class SearchService:
             df['total_funding'] + ". Overview: " + df['overview']
         )
         
-        index_stats = self.pinecone_index.describe_index_stats()
+        # Pinecone's client is synchronous; keep its calls off the event loop
+        index_stats = await asyncio.to_thread(self.pinecone_index.describe_index_stats)
         pinecone_count = index_stats['total_vector_count']
         df_count = len(df)
 
@@ -86,78 +127,73 @@ class SearchService:
             
             if pinecone_count > 0:
                 print("Clearing existing data from vector store...")
-                self.pinecone_index.delete(delete_all=True)
-
-            batch_size = 100 
-            for i in range(0, len(df), batch_size):
-                batch_df = df.iloc[i:i+batch_size]
-                
-                ids = batch_df['id'].astype(str).tolist()
-                metadatas = batch_df.to_dict(orient='records')
-                texts_to_embed = batch_df['search_text'].tolist()
-                
-                try:
-                    print(f"Embedding and upserting batch {i//batch_size + 1}/{(len(df) + batch_size - 1)//batch_size}...")
-                    embeddings_array = self.inference_client.feature_extraction(text=texts_to_embed)
-                    embeddings_list = embeddings_array.tolist()
-                    
-                    vectors_to_upsert = []
-                    for vec_id, embedding, meta in zip(ids, embeddings_list, metadatas):
-                        # Metadata for pinecone must have string, number, or boolean values
-                        clean_meta = {k: (v if v is not None else "") for k, v in meta.items()}
-                        vectors_to_upsert.append({
-                            "id": vec_id,
-                            "values": embedding,
-                            "metadata": clean_meta
-                        })
-
-                    self.pinecone_index.upsert(vectors=vectors_to_upsert)
-                    
-                except Exception as e:
-                    print(f"An error occurred during batch upsert: {e}")
-                    traceback.print_exc()
+                await asyncio.to_thread(self.pinecone_index.delete, delete_all=True)
+
+            batch_size = 100
+            total_batches = (len(df) + batch_size - 1) // batch_size
+            # Embedding and upserting are blocking network calls, so run several
+            # batches at once in worker threads, capped to stay within API limits.
+            sem = asyncio.Semaphore(self.sync_concurrency)
+
+            async def worker(batch_num: int, batch_df: pd.DataFrame):
+                async with sem:
+                    await asyncio.to_thread(self._embed_and_upsert_batch, batch_df, batch_num, total_batches)
+
+            await asyncio.gather(*(
+                worker(i // batch_size + 1, df.iloc[i:i+batch_size])
+                for i in range(0, len(df), batch_size)
+            ))
 
             print("Vector store rebuild complete.")
         else:
             print("Data is in sync with the vector store.")
         
-        final_stats = self.pinecone_index.describe_index_stats()
+        final_stats = await asyncio.to_thread(self.pinecone_index.describe_index_stats)
         print(f"Data loading and sync complete. Final vector store count: {final_stats['total_vector_count']}")
 
 
-    def _parse_monetary_value(self, value_str: str) -> float | None:
-        if not isinstance(value_str, str) or not value_str: return None
-        # Remove currency symbols and commas, handle 'B' for billion and 'M' for million
-        value_str = value_str.strip().replace('$', '').replace(',', '')
-        value_str_lower = value_str.lower()
-        
-        multiplier = 1
-        if 'b' in value_str_lower:
-            multiplier = 1_000_000_000
-            value_str = value_str_lower.replace('b', '')
-        elif 'm' in value_str_lower:
-            multiplier = 1_000_000
-            value_str = value_str_lower.replace('m', '')
-        
+    def _embed_and_upsert_batch(self, batch_df: pd.DataFrame, batch_num: int, total_batches: int):
+        ids = batch_df['id'].astype(str).tolist()
+        metadatas = batch_df.to_dict(orient='records')
+        texts_to_embed = batch_df['search_text'].tolist()
+
         try:
-            return float(value_str) * multiplier
-        except (ValueError, TypeError):
-            return None
-    
+            print(f"Embedding and upserting batch {batch_num}/{total_batches}...")
+            embeddings_array = self.inference_client.feature_extraction(text=texts_to_embed)
+            embeddings_list = embeddings_array.tolist()
+
+            vectors_to_upsert = []
+            for vec_id, embedding, meta in zip(ids, embeddings_list, metadatas):
+                # Metadata for pinecone must have string, number, or boolean values
+                clean_meta = {k: (v if v is not None else "") for k, v in meta.items()}
+                vectors_to_upsert.append({
+                    "id": vec_id,
+                    "values": embedding,
+                    "metadata": clean_meta
+                })
+
+            self.pinecone_index.upsert(vectors=vectors_to_upsert)
+
+        except Exception as e:
+            print(f"An error occurred during batch upsert: {e}")
+            traceback.print_exc()
+
     # --- MODIFIED to fetch fresh data ---
     async def semantic_search(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
         if self.pinecone_index is None or not self.inference_client:
             print("Semantic search attempted but index or client is not configured.")
             return []
 
+        # Both the embedding and the index query are blocking HTTP calls, so run them
+        # in a worker thread to keep the event loop free for other requests.
         try:
-            query_embedding_array = self.inference_client.feature_extraction(text=query)
-            query_embedding_list = query_embedding_array.tolist()
+            query_embedding_list = await asyncio.to_thread(self._embed_query, query)
         except Exception as e:
             print(f"Error embedding search query '{query}': {e}")
             return []
 
-        results = self.pinecone_index.query(
+        results = await asyncio.to_thread(
+            self.pinecone_index.query,
             vector=query_embedding_list,
             top_k=top_k,
             include_metadata=False # We only need the IDs
@@ -210,24 +246,25 @@ class SearchService:
         results = [dict(r) for r in records]
 
         # In-memory filtering for monetary values as it's complex for SQL across all DBs
+        # Each row's value is parsed once; _parse_monetary_value returns None for missing values
         if valuation:
-            min_val = self._parse_monetary_value(valuation)
+            min_val = _parse_monetary_value(valuation)
             if min_val is not None:
                 results = [
-                    r for r in results 
-                    if r.get('valuation') and self._parse_monetary_value(r['valuation']) is not None 
-                    and self._parse_monetary_value(r['valuation']) >= min_val
+                    r for r in results
+                    if (parsed := _parse_monetary_value(r.get('valuation'))) is not None
+                    and parsed >= min_val
                 ]
-        
+
         if total_funding:
-            min_funding = self._parse_monetary_value(total_funding)
+            min_funding = _parse_monetary_value(total_funding)
             if min_funding is not None:
-                 results = [
-                    r for r in results 
-                    if r.get('total_funding') and self._parse_monetary_value(r['total_funding']) is not None
-                    and self._parse_monetary_value(r['total_funding']) >= min_funding
+                results = [
+                    r for r in results
+                    if (parsed := _parse_monetary_value(r.get('total_funding'))) is not None
+                    and parsed >= min_funding
                 ]
-                
+
         return results
 
 search_service = SearchService()
\ No newline at end of file